@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别基准测试
+
+对本地验证码样本目录逐张识别，统计每次识别耗时（预处理 + OCR）和准确率。
+样本文件名即正确答案，例如 `a7K2.png`、`a7K2_003.png`（下划线后的部分忽略）。
+
+用法：
+    python benchmarks/captcha_corpus.py samples/ [--engine auto] [--min-confidence 60]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ocr_engine import get_engine, preprocess  # noqa: E402
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".bmp"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证码识别基准测试")
+    parser.add_argument("corpus", type=Path, help="验证码样本目录")
+    parser.add_argument("--engine", default="auto", help="OCR 引擎：auto/tesseract/easyocr")
+    parser.add_argument("--min-confidence", type=float, default=60, help="接受识别结果的最低置信度")
+    args = parser.parse_args()
+
+    samples = sorted(p for p in args.corpus.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not samples:
+        print(f"❌ 目录中没有验证码样本: {args.corpus}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    engine = get_engine(args.engine)
+    init_time = time.perf_counter() - start
+    print(f"引擎: {engine.name}，初始化 {init_time * 1000:.0f}ms（只在首次识别前执行一次）")
+
+    preprocess_times = []
+    total_times = []
+    correct = 0
+    accepted = 0
+    accepted_correct = 0
+    for sample in samples:
+        expected = sample.stem.split("_", 1)[0]
+        data = sample.read_bytes()
+
+        t0 = time.perf_counter()
+        image = preprocess(data)
+        t1 = time.perf_counter()
+        text, confidence = engine.recognize(image)
+        t2 = time.perf_counter()
+
+        preprocess_times.append(t1 - t0)
+        total_times.append(t2 - t0)
+        ok = text.lower() == expected.lower()
+        correct += ok
+        if confidence >= args.min_confidence:
+            accepted += 1
+            accepted_correct += ok
+        print(f"{'✓' if ok else '✗'} {sample.name:<24} -> {text:<10} 置信度 {confidence:5.1f}  "
+              f"{(t2 - t0) * 1000:6.1f}ms")
+
+    def pct(values, p):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    n = len(samples)
+    print("-" * 60)
+    print(f"样本 {n} 张，准确率 {correct / n:.1%}")
+    if accepted:
+        print(f"置信度 >= {args.min_confidence:.0f} 的结果 {accepted} 张（{accepted / n:.1%}），"
+              f"其中准确率 {accepted_correct / accepted:.1%}")
+    print(f"单次识别耗时 p50={pct(total_times, 0.5):.1f}ms p95={pct(total_times, 0.95):.1f}ms "
+          f"（其中预处理 p50={pct(preprocess_times, 0.5):.1f}ms）")
+
+
+if __name__ == "__main__":
+    main()
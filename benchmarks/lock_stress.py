@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单实例锁压力测试
+
+场景：
+1. 快速路径：无竞争时 acquire() + release() 的耗时
+2. 同时启动：数十个进程在同一时刻获取锁，检查只有一个成功、没有进程被误杀
+3. 接管：旧实例运行超过启动宽限期后启动新实例，检查旧实例被关闭、新实例获取到锁
+
+用法：
+    python benchmarks/lock_stress.py [--processes 40] [--iterations 1000]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lock_manager import LockFile  # noqa: E402
+
+
+def run_worker(lock_path: str, start_at: float, hold: float, grace: float):
+    """子进程：等到约定时刻后获取锁，成功则持有 hold 秒"""
+    lock = LockFile(lock_path, startup_grace=grace)
+
+    def on_term(signum, frame):
+        lock.release()
+        print(json.dumps({'pid': os.getpid(), 'event': 'terminated'}), flush=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+    while time.time() < start_at:
+        time.sleep(0.0005)
+
+    late = time.time() - start_at
+    t0 = time.perf_counter()
+    won = lock.acquire()
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({'pid': os.getpid(), 'event': 'result', 'won': won, 'elapsed': elapsed, 'late': late}),
+          flush=True)
+    if won:
+        time.sleep(hold)
+        lock.release()
+    sys.exit(0 if won else 1)
+
+
+def spawn(lock_path: str, start_at: float, hold: float, grace: float) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, __file__, '--worker', lock_path, str(start_at), str(hold), str(grace)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+
+
+def collect(procs):
+    """并发等待子进程结束（及时回收，避免被关闭的进程成为僵尸进程），返回 [(returncode, events)]"""
+    outputs = [None] * len(procs)
+
+    def wait(i, proc):
+        out, _ = proc.communicate()
+        events = [json.loads(line) for line in out.splitlines() if line.startswith('{')]
+        outputs[i] = (proc.returncode, events)
+
+    threads = [threading.Thread(target=wait, args=(i, p)) for i, p in enumerate(procs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outputs
+
+
+def bench_fast_path(lock_path: str, iterations: int) -> bool:
+    acquire_times = []
+    release_times = []
+    for _ in range(iterations):
+        lock = LockFile(lock_path)
+        t0 = time.perf_counter()
+        ok = lock.acquire()
+        t1 = time.perf_counter()
+        lock.release()
+        t2 = time.perf_counter()
+        if not ok:
+            print("❌ 快速路径获取锁失败")
+            return False
+        acquire_times.append(t1 - t0)
+        release_times.append(t2 - t1)
+
+    acquire_times.sort()
+    release_times.sort()
+
+    def pct(values, p):
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    print(f"快速路径 x{iterations}: acquire p50={pct(acquire_times, 0.5):.3f}ms "
+          f"p99={pct(acquire_times, 0.99):.3f}ms | release p50={pct(release_times, 0.5):.3f}ms "
+          f"p99={pct(release_times, 0.99):.3f}ms")
+    return pct(acquire_times, 0.99) < 5
+
+
+def bench_burst(lock_path: str, processes: int) -> bool:
+    # 预留足够时间让所有子进程完成启动；获胜者持有锁的时间远长于所有进程的启动偏差
+    start_at = time.time() + 2.0 + processes * 0.05
+    hold = 2.0
+    procs = [spawn(lock_path, start_at, hold=hold, grace=LockFile.STARTUP_GRACE) for _ in range(processes)]
+    outputs = collect(procs)
+
+    latest = max((e['late'] for _, events in outputs for e in events if e['event'] == 'result'), default=0)
+    if latest > hold / 2:
+        print(f"同时启动 x{processes}: 子进程启动过慢（最晚延迟 {latest:.2f}s），请减少进程数 -> ❌")
+        return False
+
+    winners = sum(1 for _, events in outputs for e in events if e['event'] == 'result' and e['won'])
+    killed = sum(1 for code, events in outputs
+                 if code < 0 or any(e['event'] == 'terminated' for e in events))
+    slowest = max((e['elapsed'] for _, events in outputs for e in events if e['event'] == 'result'), default=0)
+
+    ok = winners == 1 and killed == 0
+    print(f"同时启动 x{processes}: 获取成功 {winners} 个，被关闭 {killed} 个，"
+          f"最慢 acquire {slowest * 1000:.1f}ms -> {'✅' if ok else '❌'}")
+    return ok
+
+
+def bench_takeover(lock_path: str) -> bool:
+    grace = 0.5
+    old = spawn(lock_path, time.time(), hold=30.0, grace=grace)
+    time.sleep(grace + 1.0)
+    new = spawn(lock_path, time.time(), hold=0.2, grace=grace)
+    (old_code, old_events), (new_code, new_events) = collect([old, new])
+
+    old_terminated = any(e['event'] == 'terminated' for e in old_events)
+    new_won = any(e['event'] == 'result' and e['won'] for e in new_events)
+    ok = old_terminated and new_won
+    print(f"接管旧实例: 旧实例已关闭={old_terminated}，新实例获取成功={new_won} -> {'✅' if ok else '❌'}")
+    return ok
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        lock_path, start_at, hold, grace = sys.argv[2:6]
+        run_worker(lock_path, float(start_at), float(hold), float(grace))
+        return
+
+    parser = argparse.ArgumentParser(description="单实例锁压力测试")
+    parser.add_argument('--processes', type=int, default=40, help="同时启动的进程数")
+    parser.add_argument('--iterations', type=int, default=1000, help="快速路径测试次数")
+    args = parser.parse_args()
+
+    if os.name == 'nt':
+        print("压力测试依赖 SIGTERM 处理，仅支持 Unix。")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = str(Path(tmp) / "stress.lock")
+        results = [
+            bench_fast_path(lock_path, args.iterations),
+            bench_burst(lock_path, args.processes),
+            bench_takeover(lock_path),
+        ]
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
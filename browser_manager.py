@@ -5,16 +5,22 @@
 """
 
 import os
+import json
 import platform
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+import metrics
+
 try:
     from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+# 浏览器上下文参数（每个登录系统使用独立的上下文）
+CONTEXT_OPTIONS: Dict[str, Any] = {'viewport': {'width': 1280, 'height': 800}}
+
 
 def get_base_dir() -> Path:
     """获取程序基准目录（兼容打包环境）"""
@@ -25,21 +31,26 @@ def get_base_dir() -> Path:
         return Path.cwd()
 
 
-def find_browser_executable() -> Optional[str]:
-    """查找浏览器可执行文件路径
+def find_bundled_browser() -> Optional[str]:
+    """查找打包的浏览器（browser/chromium/），只做文件系统检查，可在任意线程调用
     
-    优先级：
-    1. 打包的浏览器（browser/chromium/）
-    2. Playwright 下载的浏览器
-    3. 系统安装的 Chrome
+    优先读取 build.py 生成的 browser/manifest.json 直接定位可执行文件，没有 manifest 时再扫描目录
     """
-    if not PLAYWRIGHT_AVAILABLE:
-        return None
-    
     base_dir = get_base_dir()
     system = platform.system()
     
-    # 优先级 1: 打包的浏览器
+    manifest_path = base_dir / "browser" / "manifest.json"
+    if manifest_path.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('platform') == system:
+                chrome_path = base_dir / "browser" / manifest['executable']
+                if chrome_path.exists():
+                    return str(chrome_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    
     browser_dir = base_dir / "browser" / "chromium"
     if browser_dir.exists():
         entries = list(browser_dir.iterdir())
@@ -70,17 +81,12 @@ def find_browser_executable() -> Optional[str]:
                 if chrome_path.exists():
                     return str(chrome_path)
     
-    # 优先级 2: Playwright 下载的浏览器
-    try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser_path = p.chromium.executable_path
-            if browser_path and os.path.exists(browser_path):
-                return browser_path
-    except:
-        pass
-    
-    # 优先级 3: 系统 Chrome
+    return None
+
+
+def find_system_browser() -> Optional[str]:
+    """查找系统安装的 Chrome"""
+    system = platform.system()
     if system == "Windows":
         chrome_candidates = [
             Path(os.environ.get("PROGRAMFILES", "C:\\Program Files")) / "Google" / "Chrome" / "Application" / "chrome.exe",
@@ -98,11 +104,60 @@ def find_browser_executable() -> Optional[str]:
     return None
 
 
-def create_browser_launch_options(slow_mo: int = 50) -> Dict[str, Any]:
+def find_browser_executable(playwright=None) -> Optional[str]:
+    """查找浏览器可执行文件路径
+    
+    优先级：
+    1. 打包的浏览器（browser/chromium/）
+    2. Playwright 下载的浏览器
+    3. 系统安装的 Chrome
+    
+    Args:
+        playwright: 已启动的 Playwright 实例；提供时直接读取其浏览器路径，
+                    避免为查询路径再启动一个驱动进程
+    """
+    if not PLAYWRIGHT_AVAILABLE:
+        return None
+    
+    # 优先级 1: 打包的浏览器
+    bundled = find_bundled_browser()
+    if bundled:
+        return bundled
+    
+    return find_installed_browser(playwright)
+
+
+def find_installed_browser(playwright=None) -> Optional[str]:
+    """查找已安装的浏览器（不含打包浏览器）：Playwright 下载的浏览器，其次系统 Chrome
+    
+    Args:
+        playwright: 已启动的 Playwright 实例，未提供时临时启动一个驱动查询路径
+    """
+    # 优先级 2: Playwright 下载的浏览器
+    try:
+        if playwright is not None:
+            browser_path = playwright.chromium.executable_path
+        else:
+            from playwright.sync_api import sync_playwright
+            with sync_playwright() as p:
+                browser_path = p.chromium.executable_path
+        if browser_path and os.path.exists(browser_path):
+            return browser_path
+    except:
+        pass
+    
+    # 优先级 3: 系统 Chrome
+    return find_system_browser()
+
+
+def create_browser_launch_options(slow_mo: int = 50, executable_path: Optional[str] = None,
+                                  find: bool = True) -> Dict[str, Any]:
     """创建浏览器启动选项
     
     Args:
         slow_mo: 操作延迟（毫秒）
+        executable_path: 浏览器路径，未提供且 find 为 True 时自动查找
+        find: 是否自动查找浏览器（调用方已查找过时传 False，使用 Playwright 默认浏览器）
     
     Returns:
         启动选项字典
@@ -112,7 +167,7 @@ def create_browser_launch_options(slow_mo: int = 50) -> Dict[str, Any]:
         'slow_mo': slow_mo,
     }
     
-    browser_path = find_browser_executable()
+    browser_path = executable_path or (find_browser_executable() if find else None)
     if browser_path:
         options['executable_path'] = browser_path
     
@@ -130,20 +185,76 @@ class BrowserManager:
         self.page: Optional[Page] = None
     
     def start(self):
-        """启动浏览器"""
+        """启动浏览器（依次执行各启动步骤）"""
+        phase = metrics.phase_duration_seconds
+        with phase.time(phase='driver'):
+            self.start_driver()
+        with phase.time(phase='discovery'):
+            executable_path = find_bundled_browser()
+        with phase.time(phase='launch'):
+            self.launch(executable_path)
+        with phase.time(phase='context'):
+            self.new_context()
+        with phase.time(phase='page'):
+            self.new_page()
+        
+        return self.page
+    
+    def start_driver(self):
+        """启动 Playwright 驱动
+        
+        同步 API 绑定启动它的线程，后续步骤必须在同一线程中调用
+        """
         if not PLAYWRIGHT_AVAILABLE:
             raise RuntimeError("Playwright 未安装。运行: pip install playwright && playwright install chromium")
         
         from playwright.sync_api import sync_playwright
         self.playwright = sync_playwright().start()
+    
+    def launch(self, executable_path: Optional[str] = None):
+        """启动浏览器进程
         
-        launch_options = create_browser_launch_options(slow_mo=self.slow_mo)
+        Args:
+            executable_path: 打包浏览器路径（find_bundled_browser() 的结果），
+                             未提供时说明没有打包浏览器，直接查找已安装的浏览器
+        """
+        executable_path = executable_path or find_installed_browser(self.playwright)
+        launch_options = create_browser_launch_options(slow_mo=self.slow_mo, executable_path=executable_path,
+                                                       find=False)
         self.browser = self.playwright.chromium.launch(**launch_options)
-        self.context = self.browser.new_context(viewport={'width': 1280, 'height': 800})
+    
+    def new_context(self):
+        """创建浏览器上下文"""
+        self.context = self.browser.new_context(**CONTEXT_OPTIONS)
+    
+    def new_page(self):
+        """创建页面"""
         self.page = self.context.new_page()
-        
         return self.page
     
+    def memory_usage(self) -> Optional[int]:
+        """浏览器进程树（Playwright 驱动及 Chromium 各进程）的常驻内存字节数
+        
+        需要 psutil，未安装或浏览器未启动时返回 None
+        """
+        if not self.browser:
+            return None
+        try:
+            import psutil
+        except ImportError:
+            return None
+        
+        total = 0
+        try:
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except psutil.Error:
+            return None
+        return total
+    
     def close(self):
         """关闭浏览器"""
         if self.browser:
@@ -6,14 +6,305 @@
 
 import os
 import sys
+import json
+import argparse
 import platform
 import subprocess
 import shutil
+import statistics
+import tempfile
+import threading
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# 精简浏览器时保留的语言包
+KEEP_LOCALES = {"en-US", "zh-CN", "en", "zh_CN", "Base"}
+
+# 精简浏览器时删除的文件/目录（相对 chrome-<平台> 目录的 glob 模式）
+TRIM_PATTERNS = [
+    # 调试符号与调试辅助文件
+    "**/*.pdb",
+    "**/*.debug",
+    "**/*.sym",
+    "**/*.dSYM",
+    # 登录场景用不到的组件与预置数据
+    "MEIPreload",
+    "PrivacySandboxAttestationsPreloaded",
+    "WidevineCdm",
+    "default_apps",
+    "*.nexe",
+    "nacl_*",
+    # 安装包元数据与桌面集成脚本
+    "deb.deps",
+    "rpm.deps",
+    "xdg-mime",
+    "xdg-settings",
+    "product_logo_*.png",
+    "chrome-wrapper",
+]
+
+# 启动耗时测量脚本：在独立进程中有界面启动浏览器（与运行时一致），输出从启动到页面可用的秒数
+LAUNCH_PROBE = """
+import sys, time
+from playwright.sync_api import sync_playwright
+with sync_playwright() as p:
+    start = time.perf_counter()
+    browser = p.chromium.launch(executable_path=sys.argv[1], headless=False)
+    browser.new_page()
+    print(time.perf_counter() - start)
+    browser.close()
+"""
+
+# 冒烟测试页面：模拟 IAM 登录页的结构
+SMOKE_TEST_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>smoke</title></head>
+<body>
+<div class="login-box-sw">账号密码登录</div>
+<div id="form" style="display:none">
+  <input id="user" placeholder="请输入用户名">
+  <input id="pwd" type="password" placeholder="请输入密码">
+  <button id="submit">登录</button>
+</div>
+<div id="home" style="display:none" title="安全生产技术综合管控平台">home</div>
+<script>
+document.querySelector('.login-box-sw').onclick = () => { form.style.display = 'block'; };
+submit.onclick = () => {
+  if (user.value && pwd.value) {
+    location.hash = '#/home';
+    home.style.display = 'block';
+  }
+};
+</script>
+</body></html>
+"""
+
+
+def dir_size(path: Path) -> int:
+    """目录总大小（字节）"""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}MB"
+
+
+def locate_playwright_chromium() -> Optional[Tuple[Path, Path]]:
+    """定位 Playwright 下载的 Chromium，返回 (chrome-<平台> 目录, 可执行文件)"""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        print("❌ 未安装 Playwright：pip install playwright && playwright install chromium")
+        return None
+
+    with sync_playwright() as p:
+        executable = Path(p.chromium.executable_path)
+    if not executable.exists():
+        print(f"❌ 未找到 Playwright 浏览器：{executable}，请先运行 playwright install chromium")
+        return None
+
+    # chrome-mac/Chromium.app/Contents/MacOS/Chromium 或 chrome-<平台>/chrome[.exe]
+    for parent in executable.parents:
+        if parent.name.startswith("chrome-"):
+            return parent, executable
+    return executable.parent, executable
+
+
+def trim_chromium(chrome_dir: Path) -> List[str]:
+    """删除不需要的语言包、资源和调试文件，返回删除的相对路径"""
+    removed = []
+
+    def remove(path: Path):
+        if not path.exists():
+            return
+        removed.append(str(path.relative_to(chrome_dir)))
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+    # Windows/Linux: locales/*.pak；macOS: *.lproj
+    for pak in chrome_dir.glob("locales/*.pak"):
+        if pak.stem not in KEEP_LOCALES:
+            remove(pak)
+    for lproj in list(chrome_dir.glob("**/*.lproj")):
+        if lproj.stem not in KEEP_LOCALES:
+            remove(lproj)
+
+    for pattern in TRIM_PATTERNS:
+        for path in list(chrome_dir.glob(pattern)):
+            remove(path)
+
+    return removed
+
+
+def measure_launch(executable: Path) -> Optional[float]:
+    """在新进程中测量一次浏览器从启动到页面可用的耗时（秒），失败返回 None"""
+    try:
+        result = subprocess.run([sys.executable, "-c", LAUNCH_PROBE, str(executable)],
+                                capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        print(f"❌ 浏览器启动超时: {executable}")
+        return None
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        print(f"❌ 浏览器启动失败: {lines[-1] if lines else result.returncode}")
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def compare_launch(untrimmed: Path, trimmed: Path, runs: int) -> Tuple[Optional[float], Optional[float]]:
+    """交替测量精简前后浏览器的启动耗时，各 runs 次，返回中位数（全部失败时为 None）
+
+    每次测量都是新进程；精简前后交替进行（每轮交换先后顺序），
+    避免磁盘缓存预热、系统负载变化等因素只影响其中一方。
+    """
+    samples = {untrimmed: [], trimmed: []}
+    for i in range(runs):
+        order = (untrimmed, trimmed) if i % 2 == 0 else (trimmed, untrimmed)
+        for executable in order:
+            elapsed = measure_launch(executable)
+            if elapsed is not None:
+                samples[executable].append(elapsed)
+
+    def median(values: List[float]) -> Optional[float]:
+        return statistics.median(values) if values else None
+
+    return median(samples[untrimmed]), median(samples[trimmed])
+
+
+def smoke_test(executable: Path) -> bool:
+    """使用 IAM 登录插件在本地模拟页面上完成一次登录"""
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    from playwright.sync_api import sync_playwright
+    from login_plugins import IAMLoginPlugin
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        Path(site_dir, "index.html").write_text(SMOKE_TEST_PAGE, encoding="utf-8")
+
+        class Handler(SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=site_dir, **kwargs)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.html#/login"
+
+        try:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(executable_path=str(executable), headless=True)
+                try:
+                    page = browser.new_page()
+                    plugin = IAMLoginPlugin("smoke", "smoke", url=url)
+                    plugin.open(page)
+                    plugin.fill(page)
+                    plugin.submit(page)
+                    return plugin.is_logged_in(page)
+                finally:
+                    browser.close()
+        except Exception as e:
+            print(f"❌ 冒烟测试出错: {e}")
+            return False
+        finally:
+            server.shutdown()
+
+
+def bundle_browser(dist_dir: Path, launch_runs: int = 5) -> bool:
+    """生成精简的 Chromium 浏览器包（dist/browser），并写入 manifest.json
+
+    运行时通过 manifest 直接定位可执行文件，无需扫描目录。
+
+    Args:
+        dist_dir: 输出目录
+        launch_runs: 精简前后各测量几次启动耗时（0 表示不测量）
+    """
+    print("=" * 60)
+    print("正在生成精简浏览器包...")
+    print("=" * 60)
+
+    located = locate_playwright_chromium()
+    if not located:
+        return False
+    source_dir, source_executable = located
+
+    browser_root = dist_dir / "browser"
+    target_dir = browser_root / "chromium" / source_dir.name
+    if browser_root.exists():
+        shutil.rmtree(browser_root)
+    print(f"复制 {source_dir} -> {target_dir}")
+    shutil.copytree(source_dir, target_dir, symlinks=True)
+
+    executable = target_dir / source_executable.relative_to(source_dir)
+
+    size_before = dir_size(target_dir)
+    removed = trim_chromium(target_dir)
+    size_after = dir_size(target_dir)
+
+    launch_before = launch_after = None
+    if launch_runs > 0:
+        # 保留一份未精简的副本（同一磁盘），与精简后的浏览器交替测量
+        with tempfile.TemporaryDirectory(dir=dist_dir) as untrimmed_root:
+            untrimmed_dir = Path(untrimmed_root) / source_dir.name
+            shutil.copytree(source_dir, untrimmed_dir, symlinks=True)
+            untrimmed_executable = untrimmed_dir / source_executable.relative_to(source_dir)
+            print(f"正在测量启动耗时（精简前后交替，各 {launch_runs} 次，有界面启动）...")
+            launch_before, launch_after = compare_launch(untrimmed_executable, executable, launch_runs)
+
+    manifest = {
+        "executable": executable.relative_to(browser_root).as_posix(),
+        "platform": platform.system(),
+        "revision": source_dir.parent.name,
+        "size": size_after,
+        "removed": removed,
+    }
+    with open(browser_root / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    def format_launch(value: Optional[float]) -> str:
+        return f"{value:.2f}s" if value is not None else "失败"
+
+    print(f"删除文件/目录: {len(removed)} 个")
+    print(f"体积: {format_size(size_before)} -> {format_size(size_after)} "
+          f"（减少 {format_size(size_before - size_after)}）")
+    if launch_runs > 0:
+        print(f"启动耗时（中位数）: {format_launch(launch_before)} -> {format_launch(launch_after)}")
+
+    if launch_before is not None and launch_after is None:
+        print("❌ 精简后的浏览器无法启动")
+        return False
+    if launch_runs > 0 and launch_before is None:
+        # 精简前也无法有界面启动（如没有图形界面的构建机），由无界面的冒烟测试验证
+        print("⚠ 无法有界面启动浏览器，跳过启动耗时对比")
+
+    print("正在运行冒烟测试（本地模拟登录页）...")
+    if not smoke_test(executable):
+        print("❌ 冒烟测试失败：精简后的浏览器未能完成登录")
+        return False
+    print("✓ 冒烟测试通过")
+    print(f"浏览器包: {browser_root}")
+    return True
 
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Python 自动登录脚本 - 打包工具")
+    parser.add_argument("--bundle-browser", action="store_true",
+                        help="打包完成后生成精简的 Chromium 浏览器包（dist/browser）")
+    parser.add_argument("--bundle-only", action="store_true",
+                        help="只生成精简浏览器包，不执行 PyInstaller 打包")
+    parser.add_argument("--with-ocr", action="store_true",
+                        help="包含验证码识别依赖（numpy、Pillow、tesserocr/pytesseract），默认不打包")
+    parser.add_argument("--launch-runs", type=int, default=5,
+                        help="生成浏览器包时精简前后各测量几次启动耗时（默认 5，0 表示不测量）")
+    args = parser.parse_args()
+
+    if args.bundle_only:
+        ok = bundle_browser(Path(__file__).parent / "dist", args.launch_runs)
+        sys.exit(0 if ok else 1)
+
     system = platform.system()
     
     print("=" * 60)
@@ -101,6 +392,11 @@ def main():
         "config",
         "browser_manager",
         "lock_manager",
+        "login_plugins",
+        "metrics",
+        "startup",
+        "ocr_engine",
+        "config_watcher",
     ]
     
     
@@ -110,7 +406,6 @@ def main():
     # 排除不必要的模块（减小体积）
     excludes = [
         "matplotlib",
-        "numpy",
         "pandas",
         "scipy",
         "tkinter",
@@ -120,13 +415,12 @@ def main():
         "PySide6",
         "pytest",
         "unittest",
-        "email",
-        "http",
         "urllib3",
-        "pytesseract",
-        "PIL",
         "easyocr",
     ]
+    # 验证码识别为可选功能，未指定 --with-ocr 时不打包其依赖
+    if not args.with_ocr:
+        excludes.extend(["numpy", "PIL", "tesserocr", "pytesseract"])
     for exc in excludes:
         pyinstaller_cmd.extend(["--exclude-module", exc])
     
@@ -147,10 +441,14 @@ def main():
         print("=" * 60)
         print(f"输出目录: {Path(__file__).parent / 'dist'}")
         print()
-        print("注意：")
-        print("1. 如果使用系统浏览器，用户需要安装 Chrome/Edge")
-        print("2. 如果需要打包浏览器，运行：playwright install chromium")
-        print("3. 然后将 browser 目录复制到 dist 目录")
+        if args.bundle_browser:
+            if not bundle_browser(Path(__file__).parent / "dist", args.launch_runs):
+                sys.exit(1)
+        else:
+            print("注意：")
+            print("1. 如果使用系统浏览器，用户需要安装 Chrome/Edge")
+            print("2. 如果需要打包浏览器，运行：playwright install chromium")
+            print("3. 然后运行 python build.py --bundle-only 生成精简浏览器包（dist/browser）")
     else:
         print()
         print("=" * 60)
@@ -7,7 +7,7 @@
 import json
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 
 
 def get_base_dir() -> Path:
@@ -18,8 +18,104 @@ def get_base_dir() -> Path:
         return Path.cwd()
 
 
+class ConfigError(RuntimeError):
+    """配置文件无法读取、不是合法 JSON 或内容有误"""
+
+
+def _check_systems(value: List[Any]) -> Optional[str]:
+    """检查 systems 列表，返回错误说明（无误返回 None）"""
+    from login_plugins import PLUGINS, PLUGIN_OPTIONS
+    for i, entry in enumerate(value):
+        if not isinstance(entry, dict):
+            return f"第 {i + 1} 项应为对象"
+        plugin = entry.get('plugin')
+        if plugin not in PLUGINS:
+            return f"第 {i + 1} 项的 plugin 无效: {plugin!r}（可用: {', '.join(sorted(PLUGINS))}）"
+        for key in ('username', 'password', 'url') + PLUGIN_OPTIONS:
+            if key in entry and not isinstance(entry[key], str):
+                return f"第 {i + 1} 项的 {key} 应为字符串"
+        if not (entry.get('url') or PLUGINS[plugin].url):
+            return f"第 {i + 1} 项（{plugin}）需要填写 url"
+    return None
+
+
+# 配置项：名称 -> (类型, 默认值, 取值检查（返回错误说明或 None）)
+CONFIG_SCHEMA: Dict[str, Tuple[Any, Any, Optional[Callable[[Any], Optional[str]]]]] = {
+    'username': (str, '', None),
+    'password': (str, '', None),
+    'slow_mo': (int, 50, lambda v: None if v >= 0 else "不能为负数"),
+    'systems': (list, [{"plugin": "iam"}], _check_systems),
+    'nav_timeout': (int, 60000, lambda v: None if v > 0 else "应大于 0（毫秒）"),
+    'action_timeout': (int, 15000, lambda v: None if v > 0 else "应大于 0（毫秒）"),
+    'metrics_port': (int, 0, lambda v: None if 0 <= v <= 65535 else "应在 0-65535 之间"),
+    'metrics_textfile': (str, '', None),
+    'ocr_engine': (str, 'auto', lambda v: None if v in ('auto', 'tesseract', 'easyocr', 'off')
+                   else "应为 auto/tesseract/easyocr/off"),
+    'captcha_max_attempts': (int, 5, lambda v: None if v >= 1 else "应至少为 1"),
+    'captcha_min_confidence': (float, 60, lambda v: None if 0 <= v <= 100 else "应在 0-100 之间"),
+    'hot_reload': (bool, False, None),
+}
+
+# 修改后需要重启程序才能生效的配置项（浏览器启动参数、已占用的端口等）
+# metrics_textfile 在程序退出时读取，修改后直接生效
+RESTART_REQUIRED_KEYS = {'slow_mo', 'metrics_port', 'hot_reload'}
+
+# 决定登录哪些系统、使用哪个账号的配置项，修改后可能需要登录新的系统
+RELOGIN_KEYS = {'systems', 'username', 'password'}
+
+_TYPE_NAMES = {str: "字符串", int: "整数", float: "数字", bool: "true/false", list: "列表"}
+
+
+def validate_config(raw: Any) -> Dict[str, Any]:
+    """校验配置并补全默认值
+
+    Returns:
+        校验后的配置（未知配置项原样保留）
+
+    Raises:
+        ConfigError: 类型或取值有误（一次列出所有错误）
+    """
+    if not isinstance(raw, dict):
+        raise ConfigError("配置文件顶层应为 JSON 对象")
+
+    errors = []
+    config = dict(raw)
+    for key, (expected, default, check) in CONFIG_SCHEMA.items():
+        if key not in raw or raw[key] is None:
+            config[key] = default
+            continue
+        value = raw[key]
+        # bool 是 int 的子类，需单独排除；数字类型接受整数
+        if expected is float:
+            valid_type = isinstance(value, (int, float)) and not isinstance(value, bool)
+        elif expected is int:
+            valid_type = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid_type = isinstance(value, expected)
+        if not valid_type:
+            errors.append(f"{key}: 应为{_TYPE_NAMES[expected]}，实际为 {json.dumps(value, ensure_ascii=False)}")
+            continue
+        if check:
+            message = check(value)
+            if message:
+                errors.append(f"{key}: {message}")
+                continue
+        config[key] = float(value) if expected is float else value
+
+    unknown = sorted(set(raw) - set(CONFIG_SCHEMA))
+    if unknown:
+        print(f"提示：忽略未知配置项 {', '.join(unknown)}（请检查拼写）")
+
+    if errors:
+        raise ConfigError("配置文件有误：\n  " + "\n  ".join(errors))
+    return config
+
+
 class Config:
-    """配置管理类"""
+    """配置管理类
+    
+    加载时按 CONFIG_SCHEMA 校验类型与取值并补全默认值，配置有误时在启动浏览器前即报错。
+    """
     
     def __init__(self, config_file: Optional[Path] = None):
         self.base_dir = get_base_dir()
@@ -27,21 +123,39 @@ class Config:
         self._config: Dict[str, Any] = {}
     
     def load(self) -> Dict[str, Any]:
-        """加载配置"""
+        """加载并校验配置"""
         if not self.config_file.exists():
             self._create_default()
             return self._config
         
+        self._config = self._read()
+        return self._config
+    
+    def _read(self) -> Dict[str, Any]:
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                self._config = json.load(f)
-            return self._config
-        except Exception as e:
-            raise RuntimeError(f"加载配置文件失败: {e}")
+                raw = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"配置文件不是合法的 JSON: {e}")
+        except (OSError, UnicodeDecodeError) as e:
+            raise ConfigError(f"加载配置文件失败: {e}")
+        return validate_config(raw)
+    
+    def reload(self) -> Set[str]:
+        """重新加载配置，返回发生变化的配置项
+        
+        新配置有误时保留当前配置并抛出 ConfigError。
+        """
+        new_config = self._read()
+        # 整体替换字典引用，其他线程读取时不会看到一半更新的配置
+        old_config = self._config
+        self._config = new_config
+        keys = set(old_config) | set(new_config)
+        return {k for k in keys if old_config.get(k) != new_config.get(k)}
     
     def save(self, config: Dict[str, Any]):
         """保存配置"""
-        self._config = config
+        self._config = validate_config(config)
         try:
             # 确保目录存在
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
@@ -58,7 +172,6 @@ class Config:
             "slow_mo": 50,  # 操作延迟（毫秒）
         }
         self.save(default_config)
-        self._config = default_config
     
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置项"""
@@ -78,3 +191,48 @@ class Config:
     def slow_mo(self) -> int:
         """操作延迟"""
         return self.get('slow_mo', 50)
+    
+    @property
+    def systems(self) -> List[Dict[str, Any]]:
+        """待登录系统列表（默认仅 IAM）"""
+        return self.get('systems') or [{"plugin": "iam"}]
+    
+    @property
+    def nav_timeout(self) -> int:
+        """页面导航超时（毫秒）"""
+        return self.get('nav_timeout', 60000)
+    
+    @property
+    def action_timeout(self) -> int:
+        """等待登录表单等元素的超时（毫秒）"""
+        return self.get('action_timeout', 15000)
+    
+    @property
+    def metrics_port(self) -> int:
+        """指标 HTTP 端点端口（0 表示不启用）"""
+        return self.get('metrics_port', 0)
+    
+    @property
+    def metrics_textfile(self) -> str:
+        """指标 textfile 导出路径（空表示不启用）"""
+        return self.get('metrics_textfile', '')
+    
+    @property
+    def ocr_engine(self) -> str:
+        """验证码 OCR 引擎：auto/tesseract/easyocr/off"""
+        return self.get('ocr_engine', 'auto')
+    
+    @property
+    def captcha_max_attempts(self) -> int:
+        """验证码最多识别次数（含第一次，每次失败后刷新验证码）"""
+        return self.get('captcha_max_attempts', 5)
+    
+    @property
+    def captcha_min_confidence(self) -> float:
+        """验证码识别最低置信度（0-100），低于此值刷新重试"""
+        return self.get('captcha_min_confidence', 60)
+    
+    @property
+    def hot_reload(self) -> bool:
+        """是否监视配置文件变化并在运行中应用"""
+        return self.get('hot_reload', False)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置热加载模块
+
+后台线程监视 config.json，文件变化后重新加载并校验；校验失败时保留当前配置。
+Linux 使用 inotify（监视所在目录，兼容编辑器“写临时文件再替换”的保存方式），
+其他平台按间隔检查修改时间。变化的配置项由主线程通过 poll() 取出并应用，
+Playwright 对象始终只在主线程中使用。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import select
+import struct
+import threading
+import time
+from typing import Optional, Set
+
+from config import Config, ConfigError
+
+# inotify 常量（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """最小化的 inotify 封装（ctypes 调用 libc）"""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch 失败")
+
+    def wait(self, timeout: float) -> Set[str]:
+        """等待事件，返回发生变化的文件名"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class ConfigWatcher:
+    """监视配置文件并在变化时重新加载"""
+
+    # 连续写入时的合并等待时间（秒）
+    DEBOUNCE = 0.05
+
+    def __init__(self, config: Config, interval: float = 1.0):
+        self.config = config
+        self.interval = interval
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    def start(self):
+        """启动后台监视线程"""
+        if platform.system() == "Linux":
+            try:
+                self._inotify = _Inotify(str(self.config.config_file.parent))
+            except (OSError, AttributeError) as e:
+                print(f"inotify 不可用（{e}），改为定时检查配置文件")
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def poll(self) -> Set[str]:
+        """取出自上次调用以来发生变化的配置项（在主线程中调用）"""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def _fingerprint(self) -> Optional[tuple]:
+        try:
+            stat = self.config.config_file.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _run(self):
+        name = self.config.config_file.name
+        last = self._fingerprint()
+        while not self._stop.is_set():
+            if self._inotify:
+                if name not in self._inotify.wait(self.interval):
+                    continue
+                # 合并编辑器保存时的多次写入
+                time.sleep(self.DEBOUNCE)
+                while self._inotify.wait(0):
+                    pass
+            else:
+                self._stop.wait(self.interval)
+                current = self._fingerprint()
+                if current is None or current == last:
+                    continue
+                last = current
+            self._reload()
+
+    def _reload(self):
+        start = time.perf_counter()
+        try:
+            changed = self.config.reload()
+        except ConfigError as e:
+            print(f"\n配置文件已修改但未生效：{e}")
+            return
+        if changed:
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"\n✓ 已重新加载配置（{elapsed:.1f}ms）：{', '.join(sorted(changed))}")
+            with self._lock:
+                self._changed |= changed
@@ -2,126 +2,191 @@
 # -*- coding: utf-8 -*-
 """
 单实例锁管理模块
+
+锁文件只用于加锁，打开时不截断，加锁是唯一的原子操作（Unix 使用 flock，Windows 使用
+msvcrt.locking）。持有者信息写入旁路文件 `<锁文件>.owner`，通过“写临时文件再替换”
+的方式原子更新，其他进程随时读取都能得到完整内容。
 """
 
 import os
 import sys
+import errno
 import time
 import json
 import platform
 import subprocess
 import signal
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any
 
-if platform.system() != "Windows":
+if platform.system() == "Windows":
+    import msvcrt
+else:
     import fcntl
 
+# 加锁失败时表示“已被其他进程锁定”的错误码（flock 为 EWOULDBLOCK，msvcrt.locking 为 EACCES/EDEADLOCK）
+_CONTENDED_ERRNOS = {errno.EAGAIN, errno.EWOULDBLOCK, errno.EACCES,
+                     getattr(errno, 'EDEADLOCK', errno.EDEADLK)}
+
 
 class LockFile:
-    """单实例锁文件管理（优化版）"""
-    
-    def __init__(self, lock_file_path: str):
+    """单实例锁文件管理"""
+
+    # 持有者获取锁后在此时间内（秒）视为同时启动，新实例直接退出而不关闭它
+    STARTUP_GRACE = 5.0
+
+    def __init__(self, lock_file_path: str, startup_grace: Optional[float] = None):
         self.lock_file_path = Path(lock_file_path)
-        self.lock_file = None
+        self.owner_file_path = self.lock_file_path.with_name(self.lock_file_path.name + ".owner")
+        self.lock_fd: Optional[int] = None
         self.pid = os.getpid()
+        self.startup_grace = self.STARTUP_GRACE if startup_grace is None else startup_grace
         self._is_windows = platform.system() == "Windows"
-    
+
     def acquire(self) -> bool:
-        """获取锁，如果已有实例运行则尝试关闭它"""
-        # 检查并处理旧实例
-        if self.lock_file_path.exists():
+        """获取锁，如果已有实例运行则尝试关闭它
+
+        Returns:
+            是否获取到锁（锁被其他实例持有且无法接管时返回 False）
+
+        Raises:
+            RuntimeError: 锁文件无法打开或加锁出错（目录不存在、只读、无权限等），不再重试
+        """
+        # 快速路径：无竞争时一次加锁即可
+        if self._try_lock():
+            return True
+
+        deadline = time.monotonic() + 1.0
+        while True:
+            owner = self.read_owner()
+            old_pid = owner.get('pid') if owner else None
+
+            if old_pid and old_pid != self.pid and self._is_process_running(old_pid):
+                age = time.time() - owner.get('start', 0) / 1000
+                if age < self.startup_grace:
+                    print(f"另一个实例 pid={old_pid} 正在启动，本实例退出。")
+                    return False
+
+                print(f"检测到先前运行的实例 pid={old_pid}，正在尝试关闭...")
+                if not self._terminate_process(old_pid):
+                    print(f"无法关闭先前实例，请手动结束进程或删除文件：{self.lock_file_path}")
+                    return False
+                print("已关闭先前实例。")
+                deadline = time.monotonic() + 1.0
+
+            # 持有者已退出，或刚获取锁尚未写入持有者信息：短暂重试
+            if self._try_lock():
+                return True
+            if time.monotonic() > deadline:
+                print(f"无法获取锁文件：{self.lock_file_path}")
+                return False
+            time.sleep(0.01)
+
+    def _try_lock(self) -> bool:
+        """尝试以非阻塞方式加锁，成功后写入持有者信息
+
+        Returns:
+            是否加锁成功（False 表示锁已被其他进程持有）
+
+        Raises:
+            RuntimeError: 锁文件无法打开或加锁出错（与锁被占用区分，重试没有意义）
+        """
+        for _ in range(10):
+            try:
+                fd = os.open(self.lock_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                raise RuntimeError(f"无法打开锁文件 {self.lock_file_path}：{e}") from e
+
             try:
-                with open(self.lock_file_path, 'r', encoding='utf-8') as f:
-                    lock_data = json.load(f)
-                    old_pid = lock_data.get('pid')
-                    if old_pid and old_pid != self.pid:
-                        if self._is_process_running(old_pid):
-                            print(f"检测到先前运行的实例 pid={old_pid}，正在尝试关闭...")
-                            if self._terminate_process(old_pid):
-                                print("已关闭先前实例。")
-                            else:
-                                print(f"无法关闭先前实例，请手动结束进程或删除文件：{self.lock_file_path}")
-                                return False
-                        else:
-                            print("发现陈旧锁文件（进程不存在），已继续。")
-            except Exception as e:
-                print(f"读取锁文件时出错：{e}")
-        
-        # 创建新的锁文件
+                if self._is_windows:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                os.close(fd)
+                if e.errno in _CONTENDED_ERRNOS:
+                    return False
+                raise RuntimeError(f"锁文件加锁失败 {self.lock_file_path}：{e}") from e
+
+            # 加锁期间锁文件可能被前一个持有者删除，此时锁住的是已脱离路径的旧文件，需重试
+            try:
+                same_file = os.fstat(fd).st_ino == os.stat(self.lock_file_path).st_ino
+            except OSError:
+                same_file = False
+            if not same_file:
+                self._unlock(fd)
+                continue
+
+            self.lock_fd = fd
+            self._write_owner()
+            return True
+        return False
+
+    def _write_owner(self):
+        """原子写入持有者信息"""
+        lock_data = {
+            'pid': self.pid,
+            'exec': sys.executable,
+            'cwd': os.getcwd(),
+            'start': int(time.time() * 1000)
+        }
+        tmp_path = self.owner_file_path.with_name(f"{self.owner_file_path.name}.{self.pid}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(lock_data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.owner_file_path)
+        except OSError as e:
+            print(f"写入锁信息时出错：{e}")
+
+    def read_owner(self) -> Optional[Dict[str, Any]]:
+        """读取当前持有者信息（不存在时返回 None）"""
+        try:
+            with open(self.owner_file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _unlock(self, fd: int):
         try:
             if self._is_windows:
-                # Windows: 使用独占模式创建文件
-                try:
-                    self.lock_file = open(self.lock_file_path, 'x', encoding='utf-8')
-                except FileExistsError:
-                    raise IOError("锁文件已存在")
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
             else:
-                # Unix: 使用 fcntl 文件锁
-                self.lock_file = open(self.lock_file_path, 'w', encoding='utf-8')
-                try:
-                    fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                except IOError:
-                    self.lock_file.close()
-                    raise
-            
-            # 写入锁信息
-            lock_data = {
-                'pid': self.pid,
-                'exec': sys.executable,
-                'cwd': os.getcwd(),
-                'start': int(time.time() * 1000)
-            }
-            json.dump(lock_data, self.lock_file, indent=2, ensure_ascii=False)
-            self.lock_file.flush()
-            
-            if self._is_windows:
-                # Windows: 可以关闭文件
-                self.lock_file.close()
-                self.lock_file = None
-            
-            return True
-        except (IOError, OSError, FileExistsError) as e:
-            if self.lock_file:
-                try:
-                    self.lock_file.close()
-                except:
-                    pass
-                self.lock_file = None
-            print(f"无法获取锁文件：{e}")
-            return False
-    
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
     def release(self):
-        """释放锁"""
+        """释放锁（仅在本实例持有锁时生效）"""
+        fd = self.lock_fd
+        if fd is None:
+            return
+        self.lock_fd = None
+
         try:
-            if self.lock_file and not self._is_windows:
-                # Unix: 释放文件锁并关闭文件
+            # 持有锁期间删除文件，保证删除的一定是自己的锁
+            try:
+                self.owner_file_path.unlink()
+            except OSError:
+                pass
+            if not self._is_windows:
                 try:
-                    fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
-                except:
+                    self.lock_file_path.unlink()
+                except OSError:
                     pass
+            self._unlock(fd)
+            if self._is_windows:
+                # Windows 无法删除已打开的文件，关闭后再删除
                 try:
-                    self.lock_file.close()
-                except:
+                    self.lock_file_path.unlink()
+                except OSError:
                     pass
-                self.lock_file = None
-            
-            # 删除锁文件（仅当是自己的锁时）
-            if self.lock_file_path.exists():
-                try:
-                    with open(self.lock_file_path, 'r', encoding='utf-8') as f:
-                        lock_data = json.load(f)
-                        if lock_data.get('pid') == self.pid:
-                            self.lock_file_path.unlink()
-                except:
-                    # 如果读取失败，也尝试删除
-                    try:
-                        self.lock_file_path.unlink()
-                    except:
-                        pass
         except Exception as e:
             print(f"释放锁文件时出错：{e}")
-    
+
     def _is_process_running(self, pid: int) -> bool:
         """检查进程是否运行"""
         try:
@@ -129,12 +194,12 @@ class LockFile:
             return True
         except OSError:
             return False
-    
+
     def _terminate_process(self, pid: int) -> bool:
         """终止进程"""
         try:
             if self._is_windows:
-                subprocess.run(['taskkill', '/PID', str(pid), '/T', '/F'], 
+                subprocess.run(['taskkill', '/PID', str(pid), '/T', '/F'],
                              capture_output=True, timeout=5)
             else:
                 os.kill(pid, signal.SIGTERM)
@@ -143,7 +208,7 @@ class LockFile:
                     time.sleep(0.2)
                 if self._is_process_running(pid):
                     os.kill(pid, signal.SIGKILL)
-            
+
             time.sleep(0.5)
             return not self._is_process_running(pid)
         except Exception as e:
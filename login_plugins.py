@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录插件模块 - 每个插件描述一个待登录系统
+
+插件定义登录地址、表单选择器、登录成功判断以及登录后的业务操作。
+同一次运行中，所有插件共用一个浏览器，每个系统使用独立的浏览器上下文（Cookie、存储互不影响）。
+运行器按阶段推进（打开页面 -> 填写表单 -> 提交 -> 判断结果 -> 后续操作）：
+各标签页的页面加载和网络请求在浏览器内同时进行，但 Playwright 同步 API 只能在一个线程中使用，
+每个阶段内 Python 端的等待仍依次进行，一个标签页等待时会推迟后面的标签页。
+插件中只使用页面事件等待（条件满足即返回），不使用固定时长的 sleep。
+
+普通的账号密码表单无需编写插件：使用通用的 form 插件，在 systems 配置中填写地址和选择器即可。
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+# systems 配置项中可覆盖的插件属性（均为字符串）
+PLUGIN_OPTIONS = (
+    'title',
+    'username_selector',
+    'password_selector',
+    'submit_selector',
+    'success_selector',
+    'captcha_image_selector',
+    'captcha_input_selector',
+    'captcha_refresh_selector',
+)
+
+
+class LoginPlugin:
+    """登录插件基类
+
+    子类通常只需覆盖类属性；登录流程特殊时再覆盖对应方法。
+    """
+
+    name = ""
+    title = ""
+    url = ""
+    username_selector = 'input[name="username"]'
+    password_selector = 'input[name="password"]'
+    submit_selector = 'button[type="submit"]'
+    # 登录成功后出现的特征元素（可选）
+    success_selector: Optional[str] = None
+    # 提交后等待页面跳转的超时（毫秒），跳转后立即返回
+    result_timeout = 10000
+    # 页面导航与加载的超时（毫秒）
+    nav_timeout = 60000
+    # 等待表单等页面元素的超时（毫秒）
+    action_timeout = 15000
+    # 图片验证码（可选）：输入框可见时识别图片并填写，刷新按钮未定义时点击图片刷新
+    captcha_image_selector: Optional[str] = None
+    captcha_input_selector: Optional[str] = None
+    captcha_refresh_selector: Optional[str] = None
+
+    def __init__(self, username: str, password: str, url: Optional[str] = None, captcha_solver=None,
+                 nav_timeout: Optional[int] = None, action_timeout: Optional[int] = None):
+        self.username = username
+        self.password = password
+        if url:
+            self.url = url
+        if nav_timeout:
+            self.nav_timeout = nav_timeout
+        if action_timeout:
+            self.action_timeout = action_timeout
+        self.captcha_solver = captcha_solver
+        self.login_url = ""
+
+    def log(self, message: str):
+        """输出带系统名称前缀的提示"""
+        print(f"[{self.title or self.name}] {message}")
+
+    def open(self, page):
+        """打开登录页面（只等待响应提交，页面加载与其他标签页并行）"""
+        page.goto(self.url, wait_until='commit', timeout=self.nav_timeout)
+
+    def wait_loaded(self, page):
+        """等待登录页加载完成（open() 只等到响应提交，加载时间计入导航超时）"""
+        page.wait_for_load_state('domcontentloaded', timeout=self.nav_timeout)
+
+    def fill(self, page):
+        """填写账号密码"""
+        self.wait_loaded(page)
+        page.wait_for_selector(self.username_selector, state='visible', timeout=self.action_timeout)
+        page.fill(self.username_selector, self.username)
+        page.fill(self.password_selector, self.password)
+        self.fill_captcha(page)
+
+    def fill_captcha(self, page):
+        """验证码输入框可见时识别并填写验证码"""
+        if not (self.captcha_solver and self.captcha_input_selector and self.captcha_image_selector):
+            return
+        if not page.locator(self.captcha_input_selector).is_visible():
+            return
+        if not self.captcha_solver.solve(page, self):
+            raise RuntimeError("验证码识别失败")
+
+    def submit(self, page):
+        """提交登录"""
+        self.login_url = page.url
+        page.click(self.submit_selector)
+
+    def is_logged_in(self, page) -> bool:
+        """判断登录是否成功：URL 改变（不等待新页面加载完成） 或 存在特征元素"""
+        try:
+            page.wait_for_url(lambda url: url != self.login_url, wait_until='commit',
+                              timeout=self.result_timeout)
+            return True
+        except:
+            pass
+
+        if self.success_selector:
+            try:
+                page.wait_for_selector(self.success_selector, timeout=3000)
+                return True
+            except:
+                pass
+        return False
+
+    def after_login(self, context, page):
+        """登录成功后的业务操作（默认无）"""
+        pass
+
+
+# 已注册的插件（名称 -> 插件类）
+PLUGINS: Dict[str, type] = {}
+
+
+def register_plugin(plugin_cls: type) -> type:
+    """注册插件（可作为类装饰器使用）"""
+    if not plugin_cls.name:
+        raise ValueError(f"插件 {plugin_cls.__name__} 未定义 name")
+    PLUGINS[plugin_cls.name] = plugin_cls
+    return plugin_cls
+
+
+@register_plugin
+class FormLoginPlugin(LoginPlugin):
+    """通用表单登录：地址和选择器全部来自 systems 配置，新增系统无需修改代码"""
+
+    name = "form"
+    title = "表单登录"
+
+
+@register_plugin
+class IAMLoginPlugin(LoginPlugin):
+    """IAM 统一身份认证 -> 安全生产技术综合管控平台"""
+
+    name = "iam"
+    title = "IAM"
+    url = "https://iam.ykjt.cc:8443/login/#/"
+    username_selector = 'input[placeholder="请输入用户名"]'
+    password_selector = 'input[placeholder="请输入密码"]'
+    submit_selector = 'button:has-text("登录")'
+    success_selector = '[title="安全生产技术综合管控平台"]'
+    captcha_image_selector = 'img[src*="captcha" i]'
+    captcha_input_selector = 'input[placeholder="请输入验证码"]'
+    mode_switch_selector = "div.login-box-sw"
+
+    def fill(self, page):
+        self.wait_loaded(page)
+        page.wait_for_selector(self.mode_switch_selector, state='visible', timeout=self.action_timeout)
+
+        # 切换到账号密码登录
+        try:
+            is_username_mode = page.locator(self.username_selector).is_visible(timeout=2000)
+        except:
+            is_username_mode = False
+
+        if not is_username_mode:
+            self.log("切换到账号密码登录方式...")
+            page.locator(self.mode_switch_selector).click()
+
+        super().fill(page)
+
+    def after_login(self, context, page):
+        # 点击进入安全生产技术综合管控平台
+        page.wait_for_selector(self.success_selector, state='visible', timeout=10000)
+
+        # 等待新标签页打开
+        with context.expect_page(timeout=10000) as page_info:
+            page.click(self.success_selector)
+        new_page = page_info.value
+
+        self.log("-> 已成功跳转至：安全生产技术综合管控平台（新标签页）")
+        new_page.wait_for_load_state('domcontentloaded', timeout=self.nav_timeout)
+
+        # 点击关闭按钮
+        try:
+            close_btn = new_page.locator('button.ant-btn').filter(has_text=r'关.*闭')
+            close_btn.wait_for(state='visible', timeout=5000)
+            close_btn.click()
+            self.log("✓ 已点击关闭按钮")
+        except:
+            # 备用方式：JavaScript点击
+            clicked = new_page.evaluate("""() => {
+                const buttons = Array.from(document.querySelectorAll('button.ant-btn'));
+                const btn = buttons.find(b => {
+                    const text = b.textContent || '';
+                    return text.includes('关') && text.includes('闭');
+                });
+                if (btn) {
+                    btn.click();
+                    return true;
+                }
+                return false;
+            }""")
+            if clicked:
+                self.log("✓ 已点击关闭按钮（JavaScript方式）")
+
+        # 跳转到安全环保首页
+        if 'dashboard' in new_page.url:
+            menu_selector = 'li[data-menu-id*="/aqhb/home"]'
+            new_page.wait_for_selector(menu_selector, timeout=10000)
+            new_page.click(menu_selector)
+            self.log("-> 已成功跳转至：安全环保首页")
+
+
+def create_plugins(systems: List[Dict[str, Any]], username: str, password: str,
+                   captcha_solver=None, **options) -> List[LoginPlugin]:
+    """根据配置创建插件实例
+
+    Args:
+        systems: 系统配置列表，每项形如 {"plugin": "iam", "username": ..., "password": ..., "url": ...}，
+                 未填写的账号密码使用全局配置；PLUGIN_OPTIONS 中的属性（选择器、标题）可逐项覆盖
+        username: 全局用户名
+        password: 全局密码
+        captcha_solver: 验证码识别器（ocr_engine.CaptchaSolver，可选）
+        options: 传给插件的其他参数（nav_timeout、action_timeout）
+
+    Returns:
+        插件实例列表
+    """
+    plugins = []
+    for entry in systems:
+        plugin_name = entry.get('plugin', '')
+        plugin_cls = PLUGINS.get(plugin_name)
+        if plugin_cls is None:
+            raise RuntimeError(f"未知的登录插件: {plugin_name}（可用: {', '.join(sorted(PLUGINS))}）")
+        plugin = plugin_cls(
+            username=entry.get('username') or username,
+            password=entry.get('password') or password,
+            url=entry.get('url'),
+            captcha_solver=captcha_solver,
+            **options,
+        )
+        for key in PLUGIN_OPTIONS:
+            if entry.get(key):
+                setattr(plugin, key, entry[key])
+        plugins.append(plugin)
+    return plugins
+
+
+class PluginResult:
+    """单个插件的登录结果与耗时"""
+
+    def __init__(self, plugin: LoginPlugin, context=None, page=None):
+        self.plugin = plugin
+        # 该系统独占的浏览器上下文
+        self.context = context
+        self.page = page
+        self.success = False
+        self.error: Optional[Exception] = None
+        # 各阶段耗时（秒）
+        self.timings: Dict[str, float] = {}
+        # 从运行开始到该插件完成登录判断的时间（秒）
+        self.login_elapsed = 0.0
+        # 从运行开始到该插件全部完成的时间（秒）
+        self.elapsed = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or not self.success
+
+    def close(self):
+        """关闭该系统的浏览器上下文（及其中所有标签页）"""
+        if self.context is not None:
+            try:
+                self.context.close()
+            except:
+                pass
+            self.context = None
+        self.page = None
+
+
+class PluginRunner:
+    """在同一个浏览器中运行多个登录插件，每个插件使用独立的浏览器上下文"""
+
+    def __init__(self, browser, plugins: List[LoginPlugin], first_page=None,
+                 context_options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            browser: 浏览器
+            plugins: 登录插件
+            first_page: 可复用的已打开页面（第一个插件使用该页面及其上下文）
+            context_options: 创建浏览器上下文的参数（如 viewport）
+        """
+        self.browser = browser
+        self.plugins = plugins
+        self.first_page = first_page
+        self.context_options = context_options or {}
+        self.results: List[PluginResult] = []
+        self.elapsed = 0.0
+
+    def _phase(self, phase: str, results: List[PluginResult], func, start: float):
+        """对所有未失败的插件执行一个阶段，单个插件异常不影响其他插件"""
+        for result in results:
+            if result.error is not None:
+                continue
+            t0 = time.perf_counter()
+            try:
+                func(result)
+            except Exception as e:
+                result.error = e
+                result.plugin.log(f"❌ {phase} 阶段出错: {e}")
+            result.timings[phase] = time.perf_counter() - t0
+            result.elapsed = time.perf_counter() - start
+
+    def run(self) -> List[PluginResult]:
+        """执行所有插件的登录流程"""
+        start = time.perf_counter()
+        results = [PluginResult(plugin) for plugin in self.plugins]
+        self.results = results
+
+        def open_page(result: PluginResult):
+            # 每个标签页创建后立即开始导航，无需等待其他标签页创建
+            if result is results[0] and self.first_page is not None:
+                result.context = self.first_page.context
+                result.page = self.first_page
+            else:
+                result.context = self.browser.new_context(**self.context_options)
+                result.page = result.context.new_page()
+            result.plugin.open(result.page)
+
+        self._phase('open', results, open_page, start)
+        self._phase('fill', results, lambda r: r.plugin.fill(r.page), start)
+        self._phase('submit', results, lambda r: r.plugin.submit(r.page), start)
+
+        def check(result: PluginResult):
+            result.success = result.plugin.is_logged_in(result.page)
+            result.login_elapsed = time.perf_counter() - start
+            if result.success:
+                result.plugin.log("✅ 登录成功！")
+            else:
+                result.plugin.log("❌ 登录失败：账号密码有误或登录页面未跳转")
+
+        self._phase('check', results, check, start)
+
+        def after_login(result: PluginResult):
+            if not result.success:
+                return
+            try:
+                result.plugin.after_login(result.context, result.page)
+            except Exception as biz_error:
+                result.plugin.log(f"登录后业务操作提示: {biz_error}")
+
+        self._phase('after_login', results, after_login, start)
+
+        self.elapsed = time.perf_counter() - start
+        return results
+
+    def report(self):
+        """输出每个插件的耗时统计"""
+        print("\n---------------------- 登录耗时 ----------------------")
+        print("（各阶段依次处理各标签页，耗时包含等待前面标签页的时间）")
+        for result in self.results:
+            plugin = result.plugin
+            if result.error is not None:
+                status = "异常"
+            else:
+                status = "成功" if result.success else "失败"
+            phases = " ".join(f"{k}={v:.2f}s" for k, v in result.timings.items())
+            print(f"{plugin.title or plugin.name:<12} {status}  登录 {result.login_elapsed:.2f}s  "
+                  f"合计 {result.elapsed:.2f}s  ({phases})")
+        serial = sum(sum(r.timings.values()) for r in self.results)
+        print(f"总耗时 {self.elapsed:.2f}s（各插件阶段耗时之和 {serial:.2f}s，阶段内串行执行）")
+        print("------------------------------------------------------")
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 自动登录脚本 - Python 版本（精简优化版）
-功能：使用 Playwright 自动登录系统（无需 OCR）
+功能：使用 Playwright 自动登录系统，支持多系统插件并行登录及图片验证码识别
 """
 
 import sys
@@ -13,9 +13,13 @@ import platform
 from pathlib import Path
 from datetime import datetime
 
-from config import Config, get_base_dir
+from config import Config, ConfigError, RELOGIN_KEYS, RESTART_REQUIRED_KEYS, get_base_dir
+from config_watcher import ConfigWatcher
 from lock_manager import LockFile
-from browser_manager import BrowserManager
+from browser_manager import BrowserManager, CONTEXT_OPTIONS
+from startup import StartupPipeline, StartupCancelled
+from login_plugins import PLUGIN_OPTIONS, PluginRunner, create_plugins
+import metrics
 
 
 def log_error(log_file: Path, message: str):
@@ -40,6 +44,60 @@ def setup_signal_handlers(lock: LockFile, log_file: Path):
         signal.signal(signal.SIGBREAK, cleanup_handler)
 
 
+def system_key(entry: dict, config: Config) -> tuple:
+    """系统的唯一标识（插件、实际使用的账号密码、地址及选择器），用于判断是否已尝试登录"""
+    return (entry.get('plugin'), entry.get('username') or config.username,
+            entry.get('password') or config.password, entry.get('url'),
+            tuple(entry.get(key) for key in PLUGIN_OPTIONS))
+
+
+def login_systems(browser, config: Config, log_file: Path, sessions: dict, first_page=None) -> list:
+    """在同一浏览器中登录尚未尝试过的系统（每个系统使用独立的浏览器上下文）
+    
+    只登录标识为新的系统：新增的系统，以及账号密码或地址被修改的系统。
+    登录失败且已从配置中移除（或标识已改变）的系统，会先关闭其标签页和上下文。
+    
+    Args:
+        browser: 浏览器
+        config: 配置
+        log_file: 错误日志文件
+        sessions: 系统标识 -> 登录结果，本次登录的结果（无论成功与否）会加入其中
+        first_page: 可复用的已打开页面
+    
+    Returns:
+        本次登录的各系统结果
+    """
+    current = {system_key(e, config) for e in config.systems}
+    for key, result in list(sessions.items()):
+        if result.failed and key not in current:
+            result.close()
+            del sessions[key]
+    
+    entries = [e for e in config.systems if system_key(e, config) not in sessions]
+    if not entries:
+        return []
+    
+    captcha_solver = None
+    if config.ocr_engine != 'off':
+        # OCR 引擎在首次出现验证码时才初始化，之后复用
+        from ocr_engine import CaptchaSolver
+        captcha_solver = CaptchaSolver(engine=config.ocr_engine,
+                                       max_attempts=config.captcha_max_attempts,
+                                       min_confidence=config.captcha_min_confidence)
+    plugins = create_plugins(entries, config.username, config.password, captcha_solver=captcha_solver,
+                             nav_timeout=config.nav_timeout, action_timeout=config.action_timeout)
+    print(f"\n>>> 正在尝试登录 {len(plugins)} 个系统...")
+    runner = PluginRunner(browser, plugins, first_page=first_page, context_options=CONTEXT_OPTIONS)
+    results = runner.run()
+    runner.report()
+    metrics.record_login_results(results)
+    for entry, result in zip(entries, results):
+        if result.error is not None:
+            log_error(log_file, f"[{result.plugin.name}] {result.error}")
+        sessions[system_key(entry, config)] = result
+    return results
+
+
 def main():
     """主函数"""
     base_dir = get_base_dir()
@@ -47,22 +105,27 @@ def main():
     log_file = base_dir / "error.log"
     lock_file = base_dir / "python-auto-login.lock"
     
-    # 单实例锁
-    lock = LockFile(str(lock_file))
-    if not lock.acquire():
-        print("无法获取锁文件，程序可能已在运行。")
-        sys.exit(1)
+    metrics.runs_total.inc()
     
+    # 启动流水线：先加载并校验配置（如果不存在会自动创建），再并行获取单实例锁与启动浏览器
+    lock = LockFile(str(lock_file))
+    config = Config(config_path)
+    browser_manager = BrowserManager()
+    pipeline = StartupPipeline(lock, config, browser_manager)
     setup_signal_handlers(lock, log_file)
     
+    metrics_server = None
     try:
-        # 加载配置（如果不存在会自动创建）
-        config = Config(config_path)
-        config_exists = config_path.exists()
-        config_data = config.load()
-        
-        # 检查是否是首次运行（配置文件刚被创建或配置为空）
-        if not config_exists or not config.username or config.username == "你的账号":
+        print(f"[系统]: {platform.system()} | 正在尝试启动浏览器...")
+        try:
+            page = pipeline.run()
+        except StartupCancelled as cancelled:
+            if pipeline.lock_acquired:
+                lock.release()
+            if cancelled.reason == 'lock':
+                print("无法获取锁文件，程序可能已在运行。")
+                sys.exit(1)
+            # 首次运行（配置文件刚被创建或配置为空）
             print("--------------------------------------------------")
             print("【首次运行提示】已在当前目录生成 config.json")
             print(f"配置文件位置: {config_path}")
@@ -70,128 +133,60 @@ def main():
             print("--------------------------------------------------")
             time.sleep(5)
             return
-        
-        username = config.username
-        password = config.password
-        slow_mo = config.slow_mo
-        
-        # 启动浏览器
-        print(f"[系统]: {platform.system()} | 正在尝试启动浏览器...")
-        browser_manager = None
+        except ConfigError as error:
+            # 配置有误：尚未做任何浏览器相关工作
+            log_error(log_file, f"[配置错误] {error}")
+            print(f"\n{error}")
+            print(f"配置文件位置: {config_path}")
+            sys.exit(1)
+        except Exception as error:
+            if pipeline.lock_acquired:
+                lock.release()
+            log_error(log_file, f"[程序异常] {error}\n{traceback.format_exc()}")
+            print(f"\n[程序异常]: {error}")
+            traceback.print_exc()
+            print("程序已安全退出。")
+            sys.exit(1)
+        except BaseException:
+            if pipeline.lock_acquired:
+                lock.release()
+            raise
+    
+        watcher = None
         try:
-            browser_manager = BrowserManager(slow_mo=slow_mo)
-            page = browser_manager.start()
-            print("✅ 浏览器启动成功")
-            
-            # 访问登录页面
-            print("正在访问登录页面...")
-            page.goto("https://iam.ykjt.cc:8443/login/#/", wait_until='domcontentloaded', timeout=60000)
-            
-            print("\n>>> 正在尝试登录...")
-            page.wait_for_selector("div.login-box-sw", state='visible', timeout=15000)
-            
-            # 切换到账号密码登录
-            try:
-                is_username_mode = page.locator('input[placeholder="请输入用户名"]').is_visible(timeout=2000)
-            except:
-                is_username_mode = False
-            
-            if not is_username_mode:
-                print("切换到账号密码登录方式...")
-                page.locator("div.login-box-sw").click()
-                time.sleep(0.5)
-            
-            # 填写账号密码
-            page.wait_for_selector('input[placeholder="请输入用户名"]', state='visible', timeout=10000)
-            page.fill('input[placeholder="请输入用户名"]', username)
-            page.fill('input[placeholder="请输入密码"]', password)
-            print("✓ 账号密码填写完成")
-            
-            # 提交登录
-            print("正在提交登录...")
-            login_url = page.url
-            page.click('button:has-text("登录")')
-            
-            # 等待登录结果
-            try:
-                page.wait_for_load_state('networkidle', timeout=10000)
-            except:
-                pass
-            time.sleep(3)
-            
-            # 检查登录是否成功
-            current_url = page.url
-            url_changed = current_url != login_url
-            
-            # 检查是否存在登录成功后的特征元素
-            has_login_element = False
-            try:
-                page.wait_for_selector('[title="安全生产技术综合管控平台"]', timeout=3000)
-                has_login_element = True
-            except:
-                pass
-            
-            # 判断登录成功：URL 改变 或 存在特征元素
-            login_success = url_changed or has_login_element
-            
-            if login_success:
-                print("✅ 登录成功！正在进入业务页面...")
+            # 指标导出（可选）：启动失败不影响登录，浏览器和锁仍由 finally 释放
+            if config.metrics_port:
                 try:
-                    time.sleep(2)
-                    
-                    # 点击进入安全生产技术综合管控平台
-                    title_selector = '[title="安全生产技术综合管控平台"]'
-                    page.wait_for_selector(title_selector, state='visible', timeout=10000)
-                    
-                    # 等待新标签页打开
-                    new_page = None
-                    with browser_manager.context.expect_page(timeout=10000) as page_info:
-                        page.click(title_selector)
-                    new_page = page_info.value
-                    
-                    print("-> 已成功跳转至：安全生产技术综合管控平台（新标签页）")
-                    new_page.wait_for_load_state('domcontentloaded')
-                    time.sleep(1)
-                    
-                    # 点击关闭按钮
-                    try:
-                        close_btn = new_page.locator('button.ant-btn').filter(has_text=r'关.*闭')
-                        close_btn.wait_for(state='visible', timeout=5000)
-                        close_btn.click()
-                        time.sleep(0.5)
-                        print("✓ 已点击关闭按钮")
-                    except:
-                        # 备用方式：JavaScript点击
-                        clicked = new_page.evaluate("""() => {
-                            const buttons = Array.from(document.querySelectorAll('button.ant-btn'));
-                            const btn = buttons.find(b => {
-                                const text = b.textContent || '';
-                                return text.includes('关') && text.includes('闭');
-                            });
-                            if (btn) {
-                                btn.click();
-                                return true;
-                            }
-                            return false;
-                        }""")
-                        if clicked:
-                            time.sleep(0.5)
-                            print("✓ 已点击关闭按钮（JavaScript方式）")
-                    
-                    # 跳转到安全环保首页
-                    if 'dashboard' in new_page.url:
-                        menu_selector = 'li[data-menu-id*="/aqhb/home"]'
-                        new_page.wait_for_selector(menu_selector, timeout=10000)
-                        new_page.click(menu_selector)
-                        print("-> 已成功跳转至：安全环保首页")
-                        
-                except Exception as biz_error:
-                    print(f"登录后业务操作提示: {biz_error}")
-                
+                    metrics_server = metrics.start_http_server(config.metrics_port)
+                    print(f"指标端点: http://127.0.0.1:{config.metrics_port}/metrics")
+                except Exception as e:
+                    print(f"指标端点启动失败: {e}")
+        
+            metrics.browser_memory_bytes.set_function(browser_manager.memory_usage)
+            print("✅ 浏览器启动成功")
+            pipeline.timings.report()
+        
+            # 在同一浏览器中登录所有系统，每个系统使用独立的上下文
+            sessions = {}
+            results = login_systems(browser_manager.browser, config, log_file, sessions, first_page=page)
+            succeeded = any(not r.failed for r in results)
+            if not succeeded:
+                print("❌ 登录失败：所有系统均未登录成功")
+        
+            # 配置热加载：账号、超时、系统列表等修改后无需重启浏览器；
+            # 登录全部失败时同样开启，修改账号密码后直接重新登录
+            if config.hot_reload:
+                watcher = ConfigWatcher(config)
+                watcher.start()
+                print(f"已开启配置热加载：{config_path}")
+        
+            if succeeded or watcher:
                 print("\n--------------------------------------------------")
+                if not succeeded:
+                    print("提示：修改 config.json 中的账号密码后会自动重新登录。")
                 print("提示：请勿关闭终端，关闭浏览器窗口即可退出程序。")
                 print("--------------------------------------------------")
-                
+            
                 # 等待浏览器关闭
                 browser_closed = False
                 try:
@@ -216,6 +211,14 @@ def main():
                                     except:
                                         pass
                                     break
+                                if watcher:
+                                    changed = watcher.poll()
+                                    if changed & RESTART_REQUIRED_KEYS:
+                                        keys = ', '.join(sorted(changed & RESTART_REQUIRED_KEYS))
+                                        print(f"提示：{keys} 需要重启程序才能生效")
+                                    if changed & RELOGIN_KEYS:
+                                        # 只登录新增或账号、地址变化的系统；超时等其他配置在下次登录时生效
+                                        login_systems(browser, config, log_file, sessions)
                                 time.sleep(0.5)  # 更频繁地检查（每0.5秒）
                             except Exception as e:
                                 # 如果浏览器对象已经无效，说明已关闭
@@ -224,25 +227,36 @@ def main():
                                 break
                 except Exception as e:
                     print(f"\n等待浏览器关闭时出错: {e}")
-                
+            
                 # 标记浏览器已关闭，避免 finally 块中重复关闭
                 if browser_closed:
                     browser_manager.browser = None
-            else:
-                print("❌ 登录失败：账号密码有误或登录页面未跳转")
-            
+        
         except Exception as error:
             error_msg = f"[程序异常] {error}\n{traceback.format_exc()}"
             log_error(log_file, error_msg)
             print(f"\n[程序异常]: {error}")
             traceback.print_exc()
         finally:
-            if browser_manager:
-                browser_manager.close()
+            if watcher:
+                watcher.stop()
+            # 关闭浏览器前记下最后的内存占用，退出时写入指标文件
+            memory = browser_manager.memory_usage()
+            metrics.browser_memory_bytes.set_function(None)
+            if memory is not None:
+                metrics.browser_memory_bytes.set(memory)
+            browser_manager.close()
+            lock.release()
             print("程序已安全退出。")
-    
     finally:
-        lock.release()
+        # 指标导出放在最外层：启动失败或提前退出时同样写入指标文件
+        if config.metrics_textfile:
+            try:
+                metrics.REGISTRY.write_textfile(base_dir / config.metrics_textfile)
+            except OSError as e:
+                print(f"写入指标文件失败: {e}")
+        if metrics_server:
+            metrics_server.shutdown()
 
 
 if __name__ == "__main__":
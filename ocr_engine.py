@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别模块 - 内存中预处理 + 复用 OCR 引擎
+
+验证码元素截图直接在内存中解码，用 NumPy 完成灰度化、二值化（Otsu）和去噪（去除孤立噪点），
+不写临时文件。OCR 引擎首次使用时初始化，之后在所有识别中复用：
+- tesseract: 优先使用 tesserocr（进程内 API，初始化一次）；未安装时退回 pytesseract，
+  它每次识别都会启动 tesseract 进程并写入临时图片文件，初始化复用对它不起作用
+- easyocr: 模型只加载一次
+"""
+
+import io
+import time
+from typing import Dict, Tuple
+
+try:
+    import numpy as np
+    from PIL import Image
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+import metrics
+
+# 验证码字符集（英文数字）
+CAPTCHA_CHARSET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def to_grayscale(rgb: "np.ndarray") -> "np.ndarray":
+    """RGB -> 灰度（ITU-R BT.601 权重）"""
+    return (rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114).astype(np.uint8)
+
+
+def otsu_threshold(gray: "np.ndarray") -> int:
+    """Otsu 自动阈值（基于直方图的向量化实现）"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = gray.size
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def remove_speckles(binary: "np.ndarray", min_neighbors: int = 2) -> "np.ndarray":
+    """去除孤立噪点：8 邻域中前景像素少于 min_neighbors 的前景像素视为噪点
+
+    与 3x3 中值滤波相比不会腐蚀 1 像素宽的笔画。
+    """
+    padded = np.pad(binary, 1, mode='constant').astype(np.uint8)
+    h, w = binary.shape
+    neighbors = np.zeros((h, w), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy == 1 and dx == 1:
+                continue
+            neighbors += padded[dy:dy + h, dx:dx + w]
+    return binary & (neighbors >= min_neighbors)
+
+
+def preprocess(image_bytes: bytes) -> "np.ndarray":
+    """预处理验证码截图：灰度 -> 二值化 -> 去噪
+
+    Returns:
+        白底黑字的 uint8 图像
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        rgb = np.asarray(image.convert('RGB'))
+    gray = to_grayscale(rgb)
+    foreground = gray <= otsu_threshold(gray)
+    # 前景占多数说明是深色背景，反转
+    if foreground.mean() > 0.5:
+        foreground = ~foreground
+    foreground = remove_speckles(foreground)
+    return np.where(foreground, 0, 255).astype(np.uint8)
+
+
+class OCREngine:
+    """OCR 引擎基类"""
+
+    name = ""
+
+    def recognize(self, image: "np.ndarray") -> Tuple[str, float]:
+        """识别预处理后的图像，返回 (文本, 置信度 0-100)"""
+        raise NotImplementedError
+
+
+class TesseractEngine(OCREngine):
+    """Tesseract 引擎（单行、限定英文数字）"""
+
+    name = "tesseract"
+
+    def __init__(self):
+        self._api = None
+        try:
+            import tesserocr
+            # 进程内 API：初始化一次，之后每次识别无需再启动 tesseract 进程
+            self._api = tesserocr.PyTessBaseAPI(lang='eng', psm=tesserocr.PSM.SINGLE_LINE)
+            self._api.SetVariable('tessedit_char_whitelist', CAPTCHA_CHARSET)
+        except ImportError:
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            print("提示：未安装 tesserocr，使用 pytesseract 识别验证码（每次识别启动 tesseract 进程并写临时文件，较慢）")
+            self._pytesseract = pytesseract
+            self._config = f'--psm 7 -c tessedit_char_whitelist={CAPTCHA_CHARSET}'
+
+    def recognize(self, image: "np.ndarray") -> Tuple[str, float]:
+        pil_image = Image.fromarray(image)
+        if self._api is not None:
+            self._api.SetImage(pil_image)
+            text = self._api.GetUTF8Text()
+            confidence = float(self._api.MeanTextConf())
+        else:
+            data = self._pytesseract.image_to_data(
+                pil_image, config=self._config, output_type=self._pytesseract.Output.DICT)
+            words = [(w, float(c)) for w, c in zip(data['text'], data['conf']) if w.strip() and float(c) >= 0]
+            text = "".join(w for w, _ in words)
+            confidence = min((c for _, c in words), default=0.0)
+        return "".join(text.split()), confidence
+
+
+class EasyOCREngine(OCREngine):
+    """EasyOCR 引擎（模型加载较慢，只加载一次）"""
+
+    name = "easyocr"
+
+    def __init__(self):
+        import easyocr
+        self._reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+
+    def recognize(self, image: "np.ndarray") -> Tuple[str, float]:
+        results = self._reader.readtext(image, allowlist=CAPTCHA_CHARSET, detail=1)
+        text = "".join(r[1] for r in results)
+        confidence = min((r[2] for r in results), default=0.0) * 100
+        return "".join(text.split()), confidence
+
+
+ENGINES = {
+    TesseractEngine.name: TesseractEngine,
+    EasyOCREngine.name: EasyOCREngine,
+}
+
+# 已初始化的引擎（名称 -> 实例），进程内复用
+_engine_cache: Dict[str, OCREngine] = {}
+
+
+def get_engine(name: str = "auto") -> OCREngine:
+    """获取 OCR 引擎（首次调用时初始化，之后复用）
+
+    Args:
+        name: auto（优先 Tesseract，不可用时使用 EasyOCR）/ tesseract / easyocr
+    """
+    if not OCR_AVAILABLE:
+        raise RuntimeError("验证码识别需要 numpy 和 Pillow。运行: pip install numpy Pillow tesserocr")
+
+    if name in _engine_cache:
+        return _engine_cache[name]
+
+    candidates = list(ENGINES) if name == "auto" else [name]
+    errors = []
+    for candidate in candidates:
+        engine_cls = ENGINES.get(candidate)
+        if engine_cls is None:
+            raise RuntimeError(f"未知的 OCR 引擎: {candidate}（可用: auto, {', '.join(ENGINES)}）")
+        try:
+            engine = engine_cls()
+        except Exception as e:
+            errors.append(f"{candidate}: {e}")
+            continue
+        _engine_cache[name] = _engine_cache[candidate] = engine
+        return engine
+
+    raise RuntimeError(f"没有可用的 OCR 引擎（{'; '.join(errors)}）")
+
+
+class CaptchaSolver:
+    """登录页验证码识别：截图 -> 预处理 -> 识别，置信度低时刷新重试"""
+
+    def __init__(self, engine: str = "auto", max_attempts: int = 5, min_confidence: float = 60,
+                 min_length: int = 4):
+        self.engine_name = engine
+        self.max_attempts = max_attempts
+        self.min_confidence = min_confidence
+        self.min_length = min_length
+
+    def recognize(self, image_bytes: bytes) -> Tuple[str, float]:
+        """识别验证码图片字节，返回 (文本, 置信度)"""
+        return get_engine(self.engine_name).recognize(preprocess(image_bytes))
+
+    def solve(self, page, plugin) -> bool:
+        """识别页面上的验证码并填入输入框
+
+        Args:
+            page: 登录页面
+            plugin: 登录插件，提供 captcha_image_selector / captcha_input_selector /
+                    captcha_refresh_selector（未提供时点击图片刷新）
+
+        Returns:
+            是否已填入置信度足够的结果
+        """
+        image = page.locator(plugin.captcha_image_selector)
+        refresh_selector = plugin.captcha_refresh_selector or plugin.captcha_image_selector
+
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.perf_counter()
+            text, confidence = self.recognize(image.screenshot(type='png'))
+            elapsed = time.perf_counter() - start
+            metrics.phase_duration_seconds.observe(elapsed, phase='captcha')
+
+            if confidence >= self.min_confidence and len(text) >= self.min_length:
+                page.fill(plugin.captcha_input_selector, text)
+                plugin.log(f"✓ 验证码识别: {text}（置信度 {confidence:.0f}，第 {attempt} 次，{elapsed * 1000:.0f}ms）")
+                return True
+
+            if attempt == self.max_attempts:
+                # 最后一次不再刷新
+                plugin.log(f"验证码置信度过低（{text!r}，{confidence:.0f}）")
+                break
+
+            plugin.log(f"验证码置信度过低（{text!r}，{confidence:.0f}），刷新重试...")
+            metrics.captcha_refreshes_total.inc(system=plugin.name)
+            old_src = image.get_attribute('src')
+            page.click(refresh_selector)
+            # 等待新图片加载完成（非 <img> 或地址不变时退化为固定等待）
+            try:
+                page.wait_for_function(
+                    "([el, src]) => el.src !== src && el.complete",
+                    arg=[image.element_handle(), old_src], timeout=3000)
+            except Exception:
+                time.sleep(0.5)
+
+        plugin.log(f"❌ 验证码识别失败（已尝试 {self.max_attempts} 次）")
+        return False
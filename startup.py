@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动流水线模块 - 并行执行互不依赖的启动步骤
+
+配置加载与校验只需几毫秒，最先执行，配置有误时不做任何浏览器相关工作。
+Playwright 同步 API 绑定启动它的线程，因此驱动启动、浏览器启动、创建上下文和页面
+都在主线程执行；单实例锁（可能需要等待旧实例退出）和打包浏览器查找
+放到后台线程，与驱动启动重叠进行。
+
+依赖关系：
+    config ─┬─> driver ────┬─> launch ──> context ──┐
+            ├─> discovery ─┘                        │
+            └─> lock ───────────────────────────────┴─> page
+
+未获取到锁时，已启动的驱动和浏览器会被关闭（取消预启动）。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import metrics
+from browser_manager import BrowserManager, find_bundled_browser
+from config import Config
+from lock_manager import LockFile
+
+
+class StartupCancelled(Exception):
+    """启动被取消（reason: 'config' 配置不完整 / 'lock' 未获取到锁）"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class StartupTimings:
+    """记录各启动步骤的起止时间"""
+
+    # 并行节省的时间低于该值（秒）时不输出，避免误差级别的数字
+    MIN_REPORTED_SAVING = 0.1
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.end = self.origin
+        # (步骤, 线程名, 开始偏移, 结束偏移)
+        self.spans: List[Tuple[str, str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def measure(self, name: str, func: Callable, *args):
+        """执行 func 并记录耗时（同时写入阶段耗时指标）"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            end = time.perf_counter()
+            metrics.phase_duration_seconds.observe(end - start, phase=name)
+            with self._lock:
+                self.spans.append((name, threading.current_thread().name,
+                                   start - self.origin, end - self.origin))
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    @property
+    def wall(self) -> float:
+        return self.end - self.origin
+
+    @property
+    def serial(self) -> float:
+        """各步骤耗时之和，即串行执行所需时间"""
+        return sum(end - start for _, _, start, end in self.spans)
+
+    def report(self):
+        """输出启动耗时明细"""
+        print("---------------------- 启动耗时 ----------------------")
+        for name, thread, start, end in sorted(self.spans, key=lambda s: s[2]):
+            print(f"{name:<10} {end - start:7.3f}s  [{start:6.3f} -> {end:6.3f}]  {thread}")
+        saved = self.serial - self.wall
+        if saved >= self.MIN_REPORTED_SAVING:
+            print(f"实际耗时 {self.wall:.3f}s，串行需 {self.serial:.3f}s，并行节省 {saved:.3f}s")
+        else:
+            print(f"实际耗时 {self.wall:.3f}s")
+        print("------------------------------------------------------")
+
+
+class StartupPipeline:
+    """启动流水线：获取锁、加载配置、启动浏览器并创建首个页面"""
+
+    def __init__(self, lock: LockFile, config: Config, browser_manager: BrowserManager):
+        self.lock = lock
+        self.config = config
+        self.browser_manager = browser_manager
+        self.timings = StartupTimings()
+        self.lock_acquired = False
+        # 配置文件在加载前是否已存在（不存在时 load() 会生成默认配置）
+        self.config_existed = False
+
+    def _load_config(self) -> bool:
+        """加载并校验配置，返回配置是否完整（配置有误时抛出 ConfigError）"""
+        self.config_existed = self.config.config_file.exists()
+        self.config.load()
+        username = self.config.username
+        return self.config_existed and bool(username) and username != "你的账号"
+
+    def _acquire_lock(self) -> bool:
+        self.lock_acquired = self.lock.acquire()
+        return self.lock_acquired
+
+    def _cancel(self):
+        """取消预启动的驱动和浏览器"""
+        self.browser_manager.close()
+
+    def run(self) -> Optional[object]:
+        """执行启动流水线
+
+        Returns:
+            首个页面
+
+        Raises:
+            ConfigError: 配置有误
+            StartupCancelled: 配置不完整或未获取到锁
+        """
+        timings = self.timings
+        manager = self.browser_manager
+        if not timings.measure('config', self._load_config):
+            timings.finish()
+            raise StartupCancelled('config')
+        manager.slow_mo = self.config.slow_mo
+
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+        try:
+            lock_future = pool.submit(timings.measure, 'lock', self._acquire_lock)
+            discovery_future = pool.submit(timings.measure, 'discovery', find_bundled_browser)
+
+            timings.measure('driver', manager.start_driver)
+
+            timings.measure('launch', manager.launch, discovery_future.result())
+            timings.measure('context', manager.new_context)
+
+            if not lock_future.result():
+                raise StartupCancelled('lock')
+
+            page = timings.measure('page', manager.new_page)
+            return page
+        except BaseException:
+            self._cancel()
+            raise
+        finally:
+            # 等待后台步骤结束（取消时锁可能仍在获取中）
+            pool.shutdown(wait=True)
+            timings.finish()
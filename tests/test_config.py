@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""配置校验与热加载测试"""
+
+import json
+
+import pytest
+
+from config import CONFIG_SCHEMA, RESTART_REQUIRED_KEYS, Config, ConfigError, validate_config
+
+
+def write_config(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_defaults_are_filled_in():
+    config = validate_config({"username": "u"})
+    for key, (_, default, _) in CONFIG_SCHEMA.items():
+        if key != "username":
+            assert config[key] == default
+    assert config["username"] == "u"
+
+
+def test_string_slow_mo_is_rejected():
+    with pytest.raises(ConfigError, match="slow_mo: 应为整数"):
+        validate_config({"slow_mo": "50"})
+
+
+def test_bool_is_not_accepted_as_int():
+    with pytest.raises(ConfigError, match="metrics_port"):
+        validate_config({"metrics_port": True})
+
+
+def test_int_is_accepted_as_float():
+    config = validate_config({"captcha_min_confidence": 70})
+    assert config["captcha_min_confidence"] == 70.0
+    assert isinstance(config["captcha_min_confidence"], float)
+
+
+@pytest.mark.parametrize("key, value", [
+    ("slow_mo", -1),
+    ("nav_timeout", 0),
+    ("metrics_port", 70000),
+    ("captcha_min_confidence", 101),
+    ("captcha_max_attempts", 0),
+    ("ocr_engine", "paddle"),
+])
+def test_out_of_range_values_are_rejected(key, value):
+    with pytest.raises(ConfigError, match=key):
+        validate_config({key: value})
+
+
+def test_all_errors_are_reported_together():
+    with pytest.raises(ConfigError) as info:
+        validate_config({"slow_mo": "50", "nav_timeout": -1})
+    message = str(info.value)
+    assert "slow_mo" in message and "nav_timeout" in message
+
+
+def test_unknown_keys_warn_but_pass(capsys):
+    config = validate_config({"headless": True})
+    assert config["headless"] is True
+    assert "headless" in capsys.readouterr().out
+
+
+def test_systems_entries_are_checked():
+    with pytest.raises(ConfigError, match="plugin 无效"):
+        validate_config({"systems": [{"plugin": "nope"}]})
+    with pytest.raises(ConfigError, match="需要填写 url"):
+        validate_config({"systems": [{"plugin": "form"}]})
+    validate_config({"systems": [{"plugin": "form", "url": "https://example.com/login"}]})
+
+
+def test_invalid_json_raises_config_error(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{bad", encoding="utf-8")
+    with pytest.raises(ConfigError, match="JSON"):
+        Config(path).load()
+
+
+def test_reload_returns_changed_keys(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, {"username": "u", "password": "p"})
+    config = Config(path)
+    config.load()
+
+    write_config(path, {"username": "u", "password": "new", "slow_mo": 80})
+    assert config.reload() == {"password", "slow_mo"}
+    assert config.password == "new"
+    assert config.reload() == set()
+
+
+def test_reload_keeps_current_config_on_error(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, {"username": "u", "slow_mo": 20})
+    config = Config(path)
+    config.load()
+
+    write_config(path, {"username": "u", "slow_mo": "fast"})
+    with pytest.raises(ConfigError):
+        config.reload()
+    assert config.slow_mo == 20
+
+
+def test_restart_keys_are_known_config_keys():
+    assert RESTART_REQUIRED_KEYS <= set(CONFIG_SCHEMA)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""单实例锁测试"""
+
+import os
+import platform
+import time
+
+import pytest
+
+from lock_manager import LockFile
+
+
+def test_acquire_release_reacquire(tmp_path):
+    lock_path = tmp_path / "app.lock"
+    lock = LockFile(str(lock_path))
+
+    assert lock.acquire()
+    assert lock.read_owner()['pid'] == os.getpid()
+
+    lock.release()
+    assert not lock_path.exists()
+    assert not lock.owner_file_path.exists()
+
+    assert lock.acquire()
+    lock.release()
+
+
+def test_release_without_acquire_is_noop(tmp_path):
+    lock = LockFile(str(tmp_path / "app.lock"))
+    lock.release()
+    assert not (tmp_path / "app.lock").exists()
+
+
+@pytest.mark.skipif(platform.system() == "Windows", reason="同一进程内的 flock 竞争仅在 Unix 上成立")
+def test_contended_lock_is_not_acquired(tmp_path):
+    lock_path = str(tmp_path / "app.lock")
+    holder = LockFile(lock_path)
+    assert holder.acquire()
+    try:
+        # 持有者就是本进程，不会被关闭，只能等待超时
+        assert not LockFile(lock_path).acquire()
+    finally:
+        holder.release()
+
+
+def test_unopenable_lock_file_fails_immediately(tmp_path):
+    lock = LockFile(str(tmp_path / "missing" / "app.lock"))
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="无法打开锁文件"):
+        lock.acquire()
+    assert time.monotonic() - start < 0.5
+    assert lock.lock_fd is None
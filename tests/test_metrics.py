@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""指标导出格式测试（Prometheus 文本格式）"""
+
+import re
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+# 样本行：指标名{标签} 数值
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[^}]*\})? (-?[0-9.e+-]+|\+Inf)$')
+
+
+def render(*metrics):
+    registry = MetricsRegistry()
+    for metric in metrics:
+        registry.register(metric)
+    return registry.render()
+
+
+def test_every_line_is_comment_or_sample():
+    counter = Counter("t_total", "计数", ("system",))
+    counter.inc(system="iam")
+    gauge = Gauge("t_bytes", "仪表")
+    gauge.set(1024)
+    histogram = Histogram("t_seconds", "耗时", ("phase",), buckets=(0.1, 1.0))
+    histogram.observe(0.5, phase="launch")
+
+    text = render(counter, gauge, histogram)
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE_LINE.match(line), line
+
+
+def test_counter_help_type_and_labels():
+    counter = Counter("logins_total", "登录次数", ("system",))
+    counter.inc(system="iam")
+    counter.inc(2, system="iam")
+    assert render(counter).splitlines() == [
+        "# HELP logins_total 登录次数",
+        "# TYPE logins_total counter",
+        'logins_total{system="iam"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("c_total", "c", ("system",))
+    counter.inc(system='a"b\\c\nd')
+    assert 'c_total{system="a\\"b\\\\c\\nd"} 1' in render(counter)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h_seconds", "h", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value)
+    lines = render(histogram).splitlines()[2:]
+    assert lines == [
+        'h_seconds_bucket{le="0.1"} 1',
+        'h_seconds_bucket{le="1"} 3',
+        'h_seconds_bucket{le="+Inf"} 4',
+        "h_seconds_sum 6.25",
+        "h_seconds_count 4",
+    ]
+
+
+def test_gauge_function_without_data_renders_no_sample():
+    gauge = Gauge("g_bytes", "g")
+    gauge.set_function(lambda: None)
+    assert render(gauge).splitlines() == ["# HELP g_bytes g", "# TYPE g_bytes gauge"]
+    gauge.set_function(lambda: 42)
+    assert render(gauge).splitlines()[-1] == "g_bytes 42"
+
+
+def test_write_textfile_replaces_atomically(tmp_path):
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("runs_total", "runs"))
+    counter.inc()
+    path = tmp_path / "out" / "auto_login.prom"
+    registry.write_textfile(path)
+    assert path.read_text(encoding="utf-8") == registry.render()
+    assert [p.name for p in path.parent.iterdir()] == ["auto_login.prom"]